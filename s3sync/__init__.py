@@ -3,7 +3,16 @@ S3 Sync Tool
 A tool for synchronizing local files with S3-compatible storage services.
 """
 
-from .s3sync import S3Sync
-
 __version__ = '0.1.1'
-__all__ = ['S3Sync'] 
\ No newline at end of file
+__all__ = ['S3Sync', 'AsyncS3Sync']
+
+
+def __getattr__(name):
+    # boto3 is slow to import, so load it only when S3Sync is first used
+    if name == 'S3Sync':
+        from .s3sync import S3Sync
+        return S3Sync
+    if name == 'AsyncS3Sync':
+        from .async_s3sync import AsyncS3Sync
+        return AsyncS3Sync
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
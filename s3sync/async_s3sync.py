@@ -0,0 +1,187 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from .s3sync import S3Sync
+from .utils import get_local_files
+
+logger = logging.getLogger(__name__)
+
+class AsyncS3Sync(S3Sync):
+    """S3Sync variant that runs transfers as coroutines on one aioboto3 client
+
+    Planning, locking and metadata are shared with S3Sync; only the remote
+    listing and the transfers move to asyncio, so trees of many small files
+    can keep hundreds of requests in flight without a thread for each.
+    Requires the optional aioboto3 dependency (pip install s3-remotely-sync[async]).
+    """
+
+    def __init__(self,
+                 local_path: str,
+                 bucket: str,
+                 prefix: str,
+                 endpoint_url: Optional[str] = None,
+                 access_key: Optional[str] = None,
+                 secret_key: Optional[str] = None,
+                 region: Optional[str] = None,
+                 **kwargs):
+        try:
+            import aioboto3
+            from aiobotocore.config import AioConfig
+        except ImportError:
+            raise ImportError(
+                "AsyncS3Sync requires aioboto3, install it with: pip install s3-remotely-sync[async]"
+            ) from None
+
+        super().__init__(local_path, bucket, prefix, endpoint_url=endpoint_url,
+                         access_key=access_key, secret_key=secret_key, region=region, **kwargs)
+
+        self.endpoint_url = endpoint_url
+        self.aio_session = aioboto3.Session(
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region
+        )
+        max_concurrency = self.transfer_config.max_concurrency
+        self.aio_config = AioConfig(
+            s3={
+                'use_accelerate_endpoint': False,
+                'addressing_style': 'virtual',
+                'payload_signing_enabled': False,
+            },
+            max_pool_connections=max(10, max_concurrency * 2),
+            retries={'max_attempts': 10, 'mode': 'adaptive'}
+        )
+
+    async def _list_remote_async(self, s3) -> Dict[str, dict]:
+        """list every object under the prefix as {rel_path: {mtime, etag, size}}"""
+        remote = {}
+        paginator = s3.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket,
+            Prefix=self._prefix_slash,
+            PaginationConfig={'PageSize': 1000}
+        )
+        async for page in pages:
+            self._add_listing_page(remote, page)
+        return remote
+
+    def _fingerprint_path(self, local_path: str, rel_path: Optional[str]) -> Tuple[str, Dict[str, float]]:
+        """ETag and file times of the file at local_path"""
+        with open(local_path, 'rb') as f:
+            return self._fingerprint(f, rel_path)
+
+    async def _upload_file_async(self, s3, semaphore: asyncio.Semaphore, rel_path: str,
+                                 s3_key: str, local_path: str,
+                                 entry: Optional[Dict] = None) -> Optional[Tuple[str, Dict[str, float]]]:
+        """Upload a file to S3, returning its ETag and file times, or None if entry shows it unchanged"""
+        async with semaphore:
+            try:
+                # hashing is blocking file I/O, kept off the event loop
+                etag, file_times = await asyncio.to_thread(self._fingerprint_path, local_path,
+                                                             rel_path if entry else None)
+                stored_etag = entry.get('etag') if entry else None
+                if stored_etag and etag == stored_etag.lower():
+                    return None
+
+                logger.info(f"上传: {rel_path}")
+                await s3.upload_file(local_path, self.bucket, s3_key, Config=self.transfer_config)
+            except Exception as e:
+                logger.error(f"upload {rel_path} failed: {str(e)}")
+                self.progress_callback('fail', rel_path)
+                raise
+
+        self.progress_callback('upload', rel_path)
+        return etag, file_times
+
+    async def _download_file_async(self, s3, semaphore: asyncio.Semaphore, rel_path: str,
+                                   s3_key: str, local_path: str, file_times: Dict[str, float]):
+        """Download a file from S3"""
+        async with semaphore:
+            try:
+                self._ensure_dir(local_path)
+                logger.info(f"下载: {rel_path}")
+
+                await s3.download_file(self.bucket, s3_key, local_path, Config=self.transfer_config)
+
+                if file_times:
+                    self._set_file_times(local_path, file_times)
+            except Exception as e:
+                logger.error(f"download {rel_path} failed: {str(e)}")
+                self.progress_callback('fail', rel_path)
+                raise
+
+        self.progress_callback('download', rel_path)
+
+    def sync(self, prescanned_files: Optional[Dict[str, int]] = None):
+        """perform sync between local and S3"""
+        asyncio.run(self.sync_async(prescanned_files))
+
+    async def sync_async(self, prescanned_files: Optional[Dict[str, int]] = None):
+        """perform sync between local and S3 on the running event loop
+
+        unlike S3Sync.sync(), a failed file does not stop the others: every
+        transfer runs to completion, the successful ones are recorded and
+        the first error is raised afterwards. Locking, metadata and the walk
+        are blocking calls and run on threads, so the loop stays responsive
+        """
+        await asyncio.to_thread(self.lock.__enter__)
+        try:
+            await self._sync_locked(prescanned_files)
+        finally:
+            # released on the way out, whether the sync finished or raised
+            await asyncio.to_thread(self.lock.release)
+
+    async def _sync_locked(self, prescanned_files: Optional[Dict[str, int]]):
+        """sync_async() once the lock is held"""
+        synced_at = time.time()
+        self._ensured_dirs.clear()
+        # bounds the requests in flight the way the transfer pool does in S3Sync
+        semaphore = asyncio.Semaphore(self.transfer_config.max_concurrency)
+
+        error = None
+        planned = []
+        tasks = []
+        metadata = None
+        known_keys = frozenset()
+        remote = {}
+        async with self.aio_session.client('s3', config=self.aio_config,
+                                           endpoint_url=self.endpoint_url) as s3:
+            remote_task = asyncio.create_task(self._list_remote_async(s3))
+            try:
+                # loaded on a thread so the listing makes progress meanwhile
+                metadata = await asyncio.to_thread(self.metadata.load)
+                known_keys = frozenset(metadata)
+                await asyncio.to_thread(self.etag_cache.load)
+                if prescanned_files is not None:
+                    local_files = prescanned_files.items()
+                else:
+                    local_files = (await asyncio.to_thread(
+                        dict, get_local_files(self.local_path, self.extensions,
+                                              self.blacklist, self.ignore_dirs))).items()
+
+                seen = set()
+                downloads = []
+                for operation, rel_path, s3_key, local_path, entry in self._plan_uploads(
+                        local_files, metadata, seen, downloads):
+                    planned.append((operation, rel_path, local_path))
+                    tasks.append(asyncio.create_task(
+                        self._upload_file_async(s3, semaphore, rel_path, s3_key, local_path, entry)
+                    ))
+
+                remote = await remote_task
+                for operation, rel_path, s3_key, local_path, file_times in self._plan_downloads(
+                        remote, metadata, seen, known_keys, downloads):
+                    planned.append((operation, rel_path, local_path))
+                    tasks.append(asyncio.create_task(
+                        self._download_file_async(s3, semaphore, rel_path, s3_key, local_path, file_times)
+                    ))
+            except Exception as e:
+                # transfers already started still finish and are recorded
+                error = e
+                remote_task.cancel()
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        await asyncio.to_thread(self._finish, metadata, known_keys, remote,
+                                zip(planned, results), synced_at, error)
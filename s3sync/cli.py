@@ -8,13 +8,9 @@ import sys
 import logging
 import argparse
 import os
-from s3sync import S3Sync
-from tqdm import tqdm
 import time
+import threading
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich import box
 from .config import Config
 
 # Configure logging
@@ -36,12 +32,18 @@ class SyncStats:
         self.total_scanned = 0
         self.to_upload = 0
         self.to_download = 0
+        # sync transfers report progress from worker threads
+        self._lock = threading.Lock()
         
     def update_scan_stats(self, total_files, to_upload, to_download):
         """update scan stats"""
         self.total_scanned = total_files
         self.to_upload = to_upload
         self.to_download = to_download
+
+        from rich import box
+        from rich.panel import Panel
+        from rich.table import Table
         
         table = Table(box=box.ROUNDED, show_header=False, border_style="bright_blue")
         table.add_column("Item", style="cyan")
@@ -64,41 +66,53 @@ class SyncStats:
     
     def start_sync_progress(self):
         """start sync"""
+        from tqdm import tqdm
+
         # 创建同步进度条
+        total = self.to_upload + self.to_download
+        # redraw at most ~10 times a second instead of once per file
         self.pbar = tqdm(
-            total=self.to_upload + self.to_download,
+            total=total,
             desc="syncing...",
             unit="files",
             bar_format="{desc:<30} |{bar:50}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}] {percentage:3.0f}%",
             colour="green",
             ncols=120,
             position=0,
-            leave=True
+            leave=True,
+            mininterval=0.1,
+            miniters=max(1, total // 1000),
+            smoothing=0.1
         )
 
     def update_progress(self, operation, filepath):
         """update progress bar and stats"""
         filename = os.path.basename(filepath)
-        if operation == 'upload':
-            self.uploaded += 1
-            self.pbar.set_description(f"↑ uploading: {filename[:30]:<30}")
-        elif operation == 'download':
-            self.downloaded += 1
-            self.pbar.set_description(f"↓ downloading: {filename[:30]:<30}")
-        elif operation == 'skip':
-            self.skipped += 1
-            self.pbar.set_description(f"○ skipped: {filename[:30]:<30}")
-        elif operation == 'fail':
-            self.failed += 1
-            self.pbar.set_description(f"× failed: {filename[:30]:<30}")
-        
-        self.pbar.update(1)
+        with self._lock:
+            if operation == 'upload':
+                self.uploaded += 1
+                self.pbar.set_description(f"↑ uploading: {filename[:30]:<30}", refresh=False)
+            elif operation == 'download':
+                self.downloaded += 1
+                self.pbar.set_description(f"↓ downloading: {filename[:30]:<30}", refresh=False)
+            elif operation == 'skip':
+                self.skipped += 1
+                self.pbar.set_description(f"○ skipped: {filename[:30]:<30}", refresh=False)
+            elif operation == 'fail':
+                self.failed += 1
+                self.pbar.set_description(f"× failed: {filename[:30]:<30}", refresh=False)
+
+            self.pbar.update(1)
 
     def print_summary(self):
         """print summary"""
         self.pbar.close()
         elapsed_time = time.time() - self.start_time
 
+        from rich import box
+        from rich.panel import Panel
+        from rich.table import Table
+
         table = Table(box=box.ROUNDED, show_header=False, border_style="bright_blue")
         table.add_column("Item", style="cyan")
         table.add_column("Value", style="green")
@@ -130,6 +144,16 @@ def configure(args):
     config.set_credentials(access_key, secret_key, profile)
     console.print(f"[green]Credentials saved to profile '{profile}'[/green]")
 
+def positive_int(value) -> int:
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(str(value))
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description='S3 Sync Tool')
     subparsers = parser.add_subparsers(dest='command')
@@ -150,6 +174,13 @@ def main():
     sync_parser.add_argument('--region', help='Region name')
     sync_parser.add_argument('--extensions', nargs='+', help='File extensions to process')
     sync_parser.add_argument('--blacklist', action='store_true', help='Treat extensions as blacklist')
+    sync_parser.add_argument('--max-workers', type=positive_int, help='Number of files transferred concurrently (default: 16)')
+    sync_parser.add_argument('--low-bandwidth', action='store_true', help='Transfer one request at a time on slow links')
+    ignore_group = sync_parser.add_mutually_exclusive_group()
+    ignore_group.add_argument('--ignore-dir', dest='ignore_dirs', nargs='+', action='extend', metavar='DIR',
+                              help='Directory names to skip at any depth (default: .git node_modules __pycache__ .venv)')
+    ignore_group.add_argument('--no-ignore-dirs', action='store_true',
+                              help='Descend into every directory, including the default ignored ones')
 
     args = parser.parse_args()
 
@@ -159,16 +190,12 @@ def main():
 
     if args.command == 'sync':
         # get credentials
-        config = Config()
-        access_key = args.access_key
-        secret_key = args.secret_key
-
-        # if command line not provide credentials, get from config file
+        access_key, secret_key = Config().resolve_credentials(
+            args.access_key, args.secret_key, args.profile
+        )
         if not (access_key and secret_key):
-            access_key, secret_key = config.get_credentials(args.profile)
-            if not (access_key and secret_key):
-                console.print("[red]Error: No credentials provided. Please run 's3rs configure' first or provide credentials via command line.[/red]")
-                sys.exit(1)
+            console.print("[red]Error: No credentials provided. Please run 's3rs configure' first or provide credentials via command line.[/red]")
+            sys.exit(1)
 
         # Load config from file
         file_config = Config.load_config(args.local_path)
@@ -182,11 +209,22 @@ def main():
             console.print("[red]Bucket must be specified either in config file or command line[/red]")
             sys.exit(1)
         
+        if 'max_workers' in config:
+            # the YAML value gets the same check as --max-workers, before any scan
+            try:
+                config['max_workers'] = positive_int(config['max_workers'])
+            except argparse.ArgumentTypeError as e:
+                console.print(f"[red]Invalid max-workers in config file: {e}[/red]")
+                sys.exit(1)
+
         if not config.get('prefix'):
             # Set default prefix to empty string if not specified
             config['prefix'] = ''
             console.print("[yellow]No prefix specified, using root of bucket[/yellow]")
 
+        # boto3 is only imported once a sync is actually going to run
+        from .s3sync import S3Sync
+
         try:
             stats = SyncStats(
                 local_path=args.local_path,
@@ -198,12 +236,16 @@ def main():
                 local_path=args.local_path,
                 bucket=config['bucket'],
                 prefix=config['prefix'],
-                endpoint_url=config['endpoint_url'],
+                endpoint_url=config.get('endpoint_url'),
                 access_key=access_key,
                 secret_key=secret_key,
-                region=config['region'],
-                extensions=config['extensions'],
+                region=config.get('region'),
+                extensions=config.get('extensions'),
                 blacklist=config['blacklist'],
+                max_workers=config.get('max_workers', S3Sync.DEFAULT_MAX_WORKERS),
+                low_bandwidth=config['low_bandwidth'],
+                cache_dir=os.path.join(Config().config_dir, 'cache'),
+                ignore_dirs=config.get('ignore_dirs'),
                 progress_callback=lambda op, fp: stats.update_progress(op, fp)
             )
 
@@ -213,7 +255,8 @@ def main():
             
             if to_upload + to_download > 0:
                 stats.start_sync_progress()
-                syncer.sync()
+                # the scan behind these stats was just made; reuse it
+                syncer.sync(prescanned_files=syncer.last_scan)
                 stats.print_summary()
             else:
                 console.print("[bold red]no files to sync[/bold red]")
@@ -3,10 +3,12 @@
 import os
 import sys
 import stat
-import yaml
 import configparser
 from typing import Optional, Dict, List, Tuple
 
+# parsed sync config files keyed by (path, mtime_ns)
+_CONFIG_CACHE: Dict[Tuple[str, int], Dict] = {}
+
 class Config:
     """Configuration handler"""
     
@@ -77,6 +79,14 @@ class Config:
                 )
         return None, None
 
+    def resolve_credentials(self, access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                            profile: str = "default") -> Tuple[Optional[str], Optional[str]]:
+        """resolve credentials, command line values first, then the profile"""
+        # the credentials file is only read when the command line lacks a key
+        if access_key and secret_key:
+            return access_key, secret_key
+        return self.get_credentials(profile)
+
     def set_credentials(self, access_key: str, secret_key: str, profile: str = "default"):
         """set credentials"""
         config = configparser.ConfigParser()
@@ -116,15 +126,31 @@ class Config:
     def load_config(local_path: str) -> Dict:
         """Load configuration from YAML file"""
         config_path = os.path.join(local_path, Config.DEFAULT_CONFIG_FILE)
-        if not os.path.exists(config_path):
+        try:
+            cache_key = (config_path, os.stat(config_path).st_mtime_ns)
+        except OSError:
             return {}
+
+        if cache_key in _CONFIG_CACHE:
+            return _CONFIG_CACHE[cache_key]
+
+        # PyYAML is only imported when there is a config file to parse
+        import yaml
+        try:
+            # libyaml-backed loader, several times faster when available
+            from yaml import CSafeLoader as YamlLoader
+        except ImportError:
+            from yaml import SafeLoader as YamlLoader
             
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+                config = yaml.load(f, Loader=YamlLoader) or {}
         except Exception as e:
             print(f"Warning: Failed to load config file: {e}")
             return {}
+
+        _CONFIG_CACHE[cache_key] = config
+        return config
     
     @staticmethod
     def merge_config(file_config: Dict, cli_args: Dict) -> Dict:
@@ -135,7 +161,14 @@ class Config:
             'endpoint_url': cli_args.get('endpoint_url') or file_config.get('endpoint-url'),
             'region': cli_args.get('region') or file_config.get('region'),
             'extensions': cli_args.get('extensions') or file_config.get('extensions'),
-            'blacklist': cli_args.get('blacklist') or file_config.get('blacklist', False)
+            'blacklist': cli_args.get('blacklist') or file_config.get('blacklist', False),
+            # 'is not None' rather than 'or': a CLI value is never replaced by the file's
+            'max_workers': (cli_args['max_workers'] if cli_args.get('max_workers') is not None
+                            else file_config.get('max-workers')),
+            'low_bandwidth': cli_args.get('low_bandwidth') or file_config.get('low-bandwidth', False),
+            # an empty list turns the directory pruning off
+            'ignore_dirs': ([] if cli_args.get('no_ignore_dirs')
+                            else cli_args.get('ignore_dirs') or file_config.get('ignore-dirs'))
         }
         
         # Remove None values
@@ -92,7 +92,10 @@ class S3SyncLock:
 
     def __enter__(self):
         """Context manager support"""
-        return self.acquire()
+        # raise instead of returning False: the with body must not run unlocked
+        if not self.acquire():
+            raise Exception("Failed to acquire remote lock")
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager support"""
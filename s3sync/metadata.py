@@ -1,35 +1,161 @@
 """Metadata handling for S3 sync"""
 
+import os
 import json
-from typing import Dict
+import hashlib
+from typing import Dict, Optional
 from botocore.exceptions import ClientError
 
+try:
+    # optional, several times faster on metadata with many entries
+    import orjson
+except ImportError:
+    orjson = None
+
+def _loads(body: bytes) -> Dict:
+    """parse the metadata object body"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def _dumps(metadata: Dict) -> bytes:
+    """serialize metadata for upload"""
+    # same indented layout either way, with non-ASCII paths written as raw
+    # UTF-8 like orjson does; only exponent floats (1e-07 vs 1e-7) differ,
+    # and metadata holds none, so both parse to the same data
+    if orjson is not None:
+        return orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+    return json.dumps(metadata, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _write_cache_file(cache_file: str, data: Dict):
+    """atomically replace a local cache file; a cache is never worth failing a sync"""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(_dumps(data))
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
 class S3SyncMetadata:
     """Handles metadata operations for S3 sync"""
 
-    def __init__(self, s3_client, bucket: str, prefix: str):
+    def __init__(self, s3_client, bucket: str, prefix: str, cache_dir: Optional[str] = None):
         self.s3_client = s3_client
         self.bucket = bucket
         self.prefix = prefix
         self.metadata_key = f"{prefix.rstrip('/')}/.sync_metadata.json"
 
+        # local copy of the last metadata seen, revalidated by ETag on load
+        self.cache_file = None
+        if cache_dir:
+            location = f"{s3_client.meta.endpoint_url}|{bucket}|{self.metadata_key}"
+            name = hashlib.sha1(location.encode('utf-8')).hexdigest()
+            self.cache_file = os.path.join(cache_dir, f"{name}.json")
+
+    def _read_cache(self) -> Optional[Dict]:
+        """cached {etag, metadata}, or None if there is no usable cache"""
+        if self.cache_file is None:
+            return None
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached = _loads(f.read())
+            return cached if cached.get('etag') else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, etag: str, metadata: Dict):
+        """remember metadata as stored under etag"""
+        if self.cache_file is not None:
+            _write_cache_file(self.cache_file, {'etag': etag, 'metadata': metadata})
+
     def load(self) -> Dict:
         """Load metadata from S3"""
+        cached = self._read_cache()
         try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket,
-                Key=self.metadata_key
-            )
-            return json.loads(response['Body'].read().decode('utf-8'))
+            if cached is None:
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket,
+                    Key=self.metadata_key
+                )
+            else:
+                # conditional GET: only transferred if it changed since cached
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket,
+                    Key=self.metadata_key,
+                    IfNoneMatch=cached['etag']
+                )
         except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
+            code = e.response['Error']['Code']
+            if code == 'NoSuchKey':
                 return {}
+            if cached is not None and code in ('304', 'NotModified'):
+                return cached['metadata']
             raise
 
+        metadata = _loads(response['Body'].read())
+        self._write_cache(response['ETag'], metadata)
+        return metadata
+
     def save(self, metadata: Dict):
         """Save metadata to S3"""
-        self.s3_client.put_object(
+        response = self.s3_client.put_object(
             Bucket=self.bucket,
             Key=self.metadata_key,
-            Body=json.dumps(metadata, indent=2).encode('utf-8')
-        ) 
\ No newline at end of file
+            Body=_dumps(metadata)
+        )
+        self._write_cache(response['ETag'], metadata) 
+
+class LocalEtagCache:
+    """ETags of local files kept between runs, keyed by (rel_path, mtime_ns, size)
+
+    a file touched without being modified stays newer than its metadata
+    entry, so without this it would be hashed again on every run
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file
+        # rel_path -> [mtime_ns, size, etag]
+        self._entries: Dict[str, list] = {}
+        # entries looked up or added since load(); only these are saved
+        self._used: Dict[str, list] = {}
+        self._added = False
+
+    def load(self):
+        """read the cache file at the start of a run"""
+        self._used = {}
+        self._added = False
+        if self.cache_file is None:
+            # without a file the cache lives as long as the instance
+            return
+        self._entries = {}
+        try:
+            with open(self.cache_file, 'rb') as f:
+                entries = _loads(f.read())
+        except (OSError, ValueError):
+            return
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def get(self, rel_path: str, mtime_ns: int, size: int) -> Optional[str]:
+        """cached ETag, if the file still has this mtime and size"""
+        entry = self._entries.get(rel_path)
+        if entry is None or entry[:2] != [mtime_ns, size]:
+            return None
+        self._used[rel_path] = entry
+        return entry[2]
+
+    def put(self, rel_path: str, mtime_ns: int, size: int, etag: str):
+        """remember the ETag just computed for a file"""
+        self._entries[rel_path] = self._used[rel_path] = [mtime_ns, size, etag]
+        self._added = True
+
+    def save(self):
+        """write back the entries used in this run; the others went stale"""
+        if not self._added and len(self._used) == len(self._entries):
+            # nothing added or dropped since load
+            return
+        self._entries = self._used
+        if self.cache_file is not None:
+            _write_cache_file(self.cache_file, self._entries)
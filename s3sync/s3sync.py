@@ -1,20 +1,43 @@
 import os
 import time
+import hashlib
 import logging
-from typing import List, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AbstractSet, BinaryIO, Iterable, Iterator, List, Optional, Dict, Set, Tuple
 import boto3
 from botocore.config import Config
-from s3transfer import TransferConfig, S3Transfer
+from boto3.s3.transfer import TransferConfig
+from s3transfer.manager import TransferManager
 from .lock import S3SyncLock
-from .metadata import S3SyncMetadata
-from .utils import get_local_files
+from .metadata import LocalEtagCache, S3SyncMetadata
+from .utils import (DEFAULT_IGNORE_DIRS, SYNC_INTERNAL_FILES, compile_file_filter, fileobj_etag,
+                    get_local_files, in_ignored_dir, is_safe_rel_path)
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# sessions keyed by credentials and region; a session caches the parsed
+# service model, so later clients skip loading botocore's JSON data again
+_SESSION_CACHE: Dict[tuple, boto3.Session] = {}
+
+def _get_session(access_key: Optional[str], secret_key: Optional[str],
+                 region: Optional[str]) -> boto3.Session:
+    """get a cached boto3 session for these credentials"""
+    key = (access_key, secret_key, region)
+    session = _SESSION_CACHE.get(key)
+    if session is None:
+        session = _SESSION_CACHE[key] = boto3.Session(
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region
+        )
+    return session
+
 class S3Sync:
     """Main S3 synchronization class"""
 
+    DEFAULT_MAX_WORKERS = 16
+
     def __init__(self, 
                  local_path: str,
                  bucket: str,
@@ -26,38 +49,71 @@ class S3Sync:
                  extensions: Optional[List[str]] = None,
                  blacklist: bool = False,
                  progress_callback: Optional[callable] = None,
-                 scan_callback: Optional[callable] = None):
+                 scan_callback: Optional[callable] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 multipart_threshold: int = 8 * 1024 * 1024,
+                 multipart_chunksize: int = 16 * 1024 * 1024,
+                 max_concurrency: Optional[int] = None,
+                 low_bandwidth: bool = False,
+                 cache_dir: Optional[str] = None,
+                 ignore_dirs: Optional[Iterable[str]] = None):
         self.local_path = os.path.abspath(local_path)
         self.bucket = bucket
         self.prefix = prefix.rstrip('/')
-        self.extensions = set(ext.lower() for ext in (extensions or []))
+        # key and path prefixes built once; keys and local paths are then a
+        # plain concatenation with the relative path
+        self._prefix_slash = self.prefix + '/'
+        self._local_root = os.path.join(self.local_path, '')
+        # lowercased once here; the scan only lowercases each file's extension
+        self.extensions = frozenset(ext.lower() for ext in (extensions or []))
         self.blacklist = blacklist
+        # directory names skipped at any depth, locally and remotely; a lone
+        # name (e.g. "ignore-dirs: build" in YAML) is one directory, not letters
+        if isinstance(ignore_dirs, str):
+            ignore_dirs = [ignore_dirs]
+        self.ignore_dirs = DEFAULT_IGNORE_DIRS if ignore_dirs is None else frozenset(ignore_dirs)
+
+        if low_bandwidth:
+            # one request at a time, so a slow link is not split between transfers
+            max_workers = max_concurrency = 1
+        elif max_concurrency is None:
+            max_concurrency = max(max_workers, (os.cpu_count() or 1) * 4)
+        self.max_workers = max_workers
         
         config = Config(
             s3={
                 'use_accelerate_endpoint': False,
                 'addressing_style': 'virtual',
                 'payload_signing_enabled': False,
-            }
+            },
+            # two connections per in-flight request, so workers never wait on
+            # the pool (botocore's default of 10 throttles wider transfers)
+            max_pool_connections=max(10, max_concurrency * 2),
+            # adaptive mode backs off client-side when S3 starts throttling
+            retries={'max_attempts': 10, 'mode': 'adaptive'},
+            tcp_keepalive=True
         )
         
-        self.s3_client = boto3.client(
+        self.s3_client = _get_session(access_key, secret_key, region).client(
             's3',
             config=config,
-            region_name=region,
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key
+            endpoint_url=endpoint_url
         )
         
-        self.metadata = S3SyncMetadata(self.s3_client, bucket, prefix) 
+        # with a cache_dir, unchanged metadata is not downloaded again
+        self.metadata = S3SyncMetadata(self.s3_client, bucket, prefix, cache_dir=cache_dir)
 
-        transfer_config = TransferConfig(
-            multipart_threshold=8 * 1024 * 1024,
-            max_concurrency=10
+        # one manager for every file: its thread pool caps the requests in
+        # flight across all transfers, while multipart parts still run in
+        # parallel, so it has to be at least as wide as the file pool
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            io_chunksize=1024 * 1024,
+            use_threads=True
         )
-
-        self.transfer = S3Transfer(self.s3_client, transfer_config)
+        self.transfer_manager = TransferManager(self.s3_client, config=self.transfer_config)
  
         self.lock = S3SyncLock(
             s3_client=self.s3_client,
@@ -65,12 +121,32 @@ class S3Sync:
             remote_lock_key=f"{prefix}/.sync_lock"
         )
 
+        # local scan made by the last get_sync_stats(), as {rel_path: mtime_ns};
+        # only reused when the caller hands it to sync() explicitly
+        self.last_scan: Optional[Dict[str, int]] = None
+        # ETags of touched files, so one touched but unmodified is hashed once
+        # rather than by every get_sync_stats() and sync(); kept on disk with
+        # a cache_dir, per tree and part size since both shape the ETag
+        etag_cache_file = None
+        if cache_dir:
+            location = (f"{self.s3_client.meta.endpoint_url}|{bucket}|{self.prefix}|{self.local_path}"
+                        f"|{multipart_threshold}|{multipart_chunksize}")
+            name = hashlib.sha1(location.encode('utf-8')).hexdigest()
+            etag_cache_file = os.path.join(cache_dir, f"{name}.etags.json")
+        self.etag_cache = LocalEtagCache(etag_cache_file)
+        # directories already created by downloads of the current sync
+        self._ensured_dirs: Set[str] = set()
+
         self.progress_callback = progress_callback or (lambda op, fp: None)
         self.scan_callback = scan_callback or (lambda: None)
 
     def _get_file_times(self, filepath: str) -> Dict[str, float]:
         """get file creation and modification time"""
-        stat = os.stat(filepath)
+        return self._stat_info(os.stat(filepath))
+
+    @staticmethod
+    def _stat_info(stat: os.stat_result) -> Dict[str, float]:
+        """file creation and modification time, and size, from a stat result"""
         try:
             ctime = stat.st_birthtime  # macOS
         except AttributeError:
@@ -78,35 +154,120 @@ class S3Sync:
         
         return {
             'ctime': ctime,
-            'mtime': stat.st_mtime
+            'mtime': stat.st_mtime,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size
         }
 
     def _set_file_times(self, filepath: str, times: Dict[str, float]):
         """set file access and modification time"""
-        os.utime(filepath, (times['mtime'], times['mtime']))
+        mtime_ns = times.get('mtime_ns')
+        if mtime_ns is None:
+            os.utime(filepath, (times['mtime'], times['mtime']))
+        else:
+            os.utime(filepath, ns=(mtime_ns, mtime_ns))
+
+    @staticmethod
+    def _compare_mtime(local_mtime_ns: int, entry: Dict) -> int:
+        """compare a local mtime with a metadata entry: >0 newer, <0 older, 0 equal"""
+        remote_mtime_ns = entry.get('mtime_ns')
+        if remote_mtime_ns is None:
+            # entry from an older version that only stored st_mtime; rebuild
+            # the float exactly the way os.stat() derives it from nanoseconds
+            local_mtime = local_mtime_ns // 10**9 + local_mtime_ns % 10**9 * 1e-9
+            return (local_mtime > entry['mtime']) - (local_mtime < entry['mtime'])
+        return (local_mtime_ns > remote_mtime_ns) - (local_mtime_ns < remote_mtime_ns)
+
+    def _local_etag(self, f: BinaryIO, size: int) -> str:
+        """ETag the open local file gets when uploaded with our transfer config"""
+        return fileobj_etag(
+            f,
+            size,
+            self.transfer_config.multipart_threshold,
+            self.transfer_config.multipart_chunksize
+        )
+
+    def _cached_etag(self, f: BinaryIO, rel_path: str, stat: os.stat_result) -> str:
+        """ETag of an open touched file, from the ETag cache when it is still valid"""
+        etag = self.etag_cache.get(rel_path, stat.st_mtime_ns, stat.st_size)
+        if etag is None:
+            etag = self._local_etag(f, stat.st_size)
+            f.seek(0)
+            self.etag_cache.put(rel_path, stat.st_mtime_ns, stat.st_size, etag)
+        return etag
+
+    def _is_unchanged(self, rel_path: str, entry: Dict) -> bool:
+        """check whether a newer local file still has the uploaded content"""
+        etag = entry.get('etag')
+        if not etag:
+            return False
+        with open(self._local_root + rel_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # a different size is a change for sure, no need to hash
+            if entry.get('size', stat.st_size) != stat.st_size:
+                return False
+            return self._cached_etag(f, rel_path, stat) == etag.lower()
 
-    def _upload_file(self, rel_path: str, s3_key: str):
-        """Upload a file to S3"""
+    def _fingerprint(self, f: BinaryIO, rel_path: Optional[str] = None) -> Tuple[str, Dict[str, float]]:
+        """ETag and file times of an open file, rewound afterwards for the upload
+
+        with a rel_path the file is a touched one and goes through the ETag
+        cache; new files are hashed once anyway
+        """
+        # fstat on the open descriptor, so the times match the bytes hashed
+        stat = os.fstat(f.fileno())
+        if rel_path is not None:
+            etag = self._cached_etag(f, rel_path, stat)
+        else:
+            etag = self._local_etag(f, stat.st_size)
+            f.seek(0)
+        return etag, self._stat_info(stat)
+
+    def _upload_file(self, rel_path: str, s3_key: str, local_path: str,
+                     entry: Optional[Dict] = None) -> Optional[Tuple[str, Dict[str, float]]]:
+        """Upload a file to S3, returning its ETag and file times
+
+        with an entry, the upload is skipped (None returned) when the
+        content still matches the ETag stored there
+        """
         try:
-            local_path = os.path.join(self.local_path, rel_path)
-            logger.info(f"上传: {rel_path}")
-            
-            self.s3_client.upload_file(local_path, self.bucket, s3_key)
-            
+            # opened once: the same handle is stat'ed, hashed and uploaded
+            with open(local_path, 'rb') as f:
+                etag, file_times = self._fingerprint(f, rel_path if entry else None)
+                stored_etag = entry.get('etag') if entry else None
+                if stored_etag and etag == stored_etag.lower():
+                    return None
+
+                logger.info(f"上传: {rel_path}")
+                if file_times['size'] < self.transfer_config.multipart_threshold:
+                    # a single PUT; the transfer manager's multipart machinery
+                    # and thread hop only pay off for large files
+                    self.s3_client.put_object(Bucket=self.bucket, Key=s3_key, Body=f)
+                else:
+                    self.transfer_manager.upload(f, self.bucket, s3_key).result()
+
             self.progress_callback('upload', rel_path)
+            return etag, file_times
         except Exception as e:
             logger.error(f"upload {rel_path} failed: {str(e)}")
             self.progress_callback('fail', rel_path)
             raise
 
-    def _download_file(self, rel_path: str, s3_key: str, file_times: Dict[str, float]):
+    def _ensure_dir(self, local_path: str):
+        """create the parent directory of local_path once per sync"""
+        directory = os.path.dirname(local_path)
+        if directory not in self._ensured_dirs:
+            # exist_ok: two workers may race on the same new directory
+            os.makedirs(directory, exist_ok=True)
+            self._ensured_dirs.add(directory)
+
+    def _download_file(self, rel_path: str, s3_key: str, local_path: str, file_times: Dict[str, float]):
         """Download a file from S3"""
         try:
-            local_path = os.path.join(self.local_path, rel_path)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            self._ensure_dir(local_path)
             logger.info(f"下载: {rel_path}")
             
-            self.s3_client.download_file(self.bucket, s3_key, local_path)
+            self.transfer_manager.download(self.bucket, s3_key, local_path).result()
             
             if file_times:
                 self._set_file_times(local_path, file_times)
@@ -117,50 +278,251 @@ class S3Sync:
             self.progress_callback('fail', rel_path)
             raise
 
-    def sync(self):
-        """perform sync between local and S3"""
-        if not self.lock.acquire():
-            logger.error("Another sync process is running")
-            return
+    def _list_remote(self) -> Dict[str, dict]:
+        """list every object under the prefix as {rel_path: {mtime, etag, size}}"""
+        remote = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket,
+            Prefix=self._prefix_slash,
+            PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            self._add_listing_page(remote, page)
+        return remote
+
+    def _add_listing_page(self, remote: Dict[str, dict], page: Dict):
+        """add the objects of one list_objects_v2 page to remote"""
+        prefix_len = len(self._prefix_slash)
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            # skip "folder" placeholder objects and sync bookkeeping, ours or
+            # that of a sync root nested below the prefix
+            if key.endswith('/') or key.rpartition('/')[2] in SYNC_INTERNAL_FILES:
+                continue
+            rel_path = key[prefix_len:]
+            if not is_safe_rel_path(rel_path):
+                # e.g. pre/../x.txt would be downloaded outside local_path
+                logger.warning(f"skipping {key}: not a path inside the sync root")
+                continue
+            remote[rel_path] = {
+                'mtime': obj['LastModified'].timestamp(),
+                'etag': obj['ETag'].strip('"').lower(),
+                'size': obj['Size']
+            }
 
-        try:
-            metadata = self.metadata.load()
-            local_files = get_local_files(self.local_path, self.extensions, self.blacklist)
-
-            for rel_path, local_mtime in local_files.items():
-                s3_key = f"{self.prefix}/{rel_path}"
-                
-                if rel_path in metadata:
-                    s3_mtime = metadata[rel_path]['mtime']
-                    
-                    if local_mtime > s3_mtime:
-                        self._upload_file(rel_path, s3_key)
-                        file_times = self._get_file_times(os.path.join(self.local_path, rel_path))
-                        metadata[rel_path] = {
-                            'ctime': file_times['ctime'],
-                            'mtime': file_times['mtime'],
-                            'synced_at': time.time()
-                        }
-                    elif local_mtime < s3_mtime:
-                        self._download_file(rel_path, s3_key, metadata.get(rel_path))
-                else:
-                    self._upload_file(rel_path, s3_key)
-                    file_times = self._get_file_times(os.path.join(self.local_path, rel_path))
-                    metadata[rel_path] = {
-                        'ctime': file_times['ctime'],
-                        'mtime': file_times['mtime'],
-                        'synced_at': time.time()
-                    }
-
-            for rel_path in metadata:
-                if rel_path not in local_files:
-                    s3_key = f"{self.prefix}/{rel_path}"
-                    self._download_file(rel_path, s3_key, metadata.get(rel_path))
+    def _plan_local(self, local_files: Iterable[Tuple[str, int]], metadata: Dict,
+                    seen: Set[str]) -> Iterator[Tuple[str, str, Optional[Dict]]]:
+        """classify local files in one pass, yielding (operation, rel_path, entry)
 
+        operation is 'upload', 'download' or 'touched' (newer mtime, content
+        still to be compared); every path is added to seen for the remote pass
+        """
+        for rel_path, local_mtime in local_files:
+            seen.add(rel_path)
+            entry = metadata.get(rel_path)
+            if entry is None:
+                yield 'upload', rel_path, None
+                continue
+
+            newer = self._compare_mtime(local_mtime, entry)
+            if newer > 0:
+                yield 'touched', rel_path, entry
+            elif newer < 0:
+                yield 'download', rel_path, entry
+
+    def _missing_locally(self, remote: Dict[str, dict], local_keys: AbstractSet[str],
+                         known_keys: AbstractSet[str]) -> List[str]:
+        """remote objects that should be downloaded because they are not local
+
+        known_keys are the paths metadata had when loaded; they bypass the
+        extension filter since they were synced before. Objects below an
+        ignored directory are never downloaded: the walk did not look there,
+        so they may well exist locally
+        """
+        sync_file = compile_file_filter(self.extensions, self.blacklist)
+        return [
+            rel_path for rel_path in remote.keys() - local_keys
+            if (rel_path in known_keys or sync_file(os.path.basename(rel_path)))
+            and not in_ignored_dir(rel_path, self.ignore_dirs)
+        ]
+
+    def _record_transfer(self, metadata: Dict, known_keys: AbstractSet[str],
+                         remote: Dict[str, dict], operation: str, rel_path: str, local_path: str,
+                         uploaded: Optional[Tuple[str, Dict[str, float]]], synced_at: float) -> bool:
+        """store a finished transfer in metadata, returning whether it changed
+
+        uploaded is what _upload_file returned; downloads are stat'ed here
+        """
+        # record uploads, and downloads metadata did not know about when loaded
+        if operation == 'download':
+            if rel_path in known_keys:
+                return False
+            etag = remote[rel_path]['etag']
+            file_times = self._get_file_times(local_path)
+        elif uploaded is None:
+            return False
+        else:
+            etag, file_times = uploaded
+        metadata[rel_path] = {
+            'ctime': file_times['ctime'],
+            # float mtime is kept for older clients sharing the metadata
+            'mtime': file_times['mtime'],
+            'mtime_ns': file_times['mtime_ns'],
+            'size': file_times['size'],
+            'etag': etag,
+            'synced_at': synced_at
+        }
+        return True
+
+    @staticmethod
+    def _remote_file_times(remote_entry: Dict) -> Dict[str, float]:
+        """file times for an object metadata has no entry for"""
+        mtime = remote_entry['mtime']
+        return {'ctime': mtime, 'mtime': mtime, 'mtime_ns': round(mtime * 10**9)}
+
+    def _plan_uploads(self, local_files: Iterable[Tuple[str, int]], metadata: Dict, seen: Set[str],
+                      downloads: List[Tuple[str, Dict]]) -> Iterator[Tuple[str, str, str, str, Optional[Dict]]]:
+        """uploads to start while the walk runs, as (operation, rel_path, s3_key, local_path, entry)
+
+        entry is set for a touched file, which is hashed first and only
+        uploaded if its content moved; downloads wait in downloads for the
+        listing, as a metadata entry may outlive its object
+        """
+        prefix_slash = self._prefix_slash
+        local_root = self._local_root
+        for operation, rel_path, entry in self._plan_local(local_files, metadata, seen):
+            if operation == 'download':
+                downloads.append((rel_path, entry))
+                continue
+            yield ('upload', rel_path, prefix_slash + rel_path, local_root + rel_path,
+                   entry if operation == 'touched' else None)
+
+    def _plan_downloads(self, remote: Dict[str, dict], metadata: Dict, seen: Set[str],
+                        known_keys: AbstractSet[str],
+                        downloads: List[Tuple[str, Dict]]) -> Iterator[Tuple[str, str, str, str, Dict]]:
+        """downloads once the listing is in, as (operation, rel_path, s3_key, local_path, file_times)"""
+        prefix_slash = self._prefix_slash
+        local_root = self._local_root
+        # stale metadata entries are not downloaded, and objects missing
+        # from metadata are still picked up
+        for rel_path, entry in downloads:
+            if rel_path in remote:
+                yield 'download', rel_path, prefix_slash + rel_path, local_root + rel_path, entry
+        for rel_path in self._missing_locally(remote, seen, known_keys):
+            file_times = metadata.get(rel_path) or self._remote_file_times(remote[rel_path])
+            yield 'download', rel_path, prefix_slash + rel_path, local_root + rel_path, file_times
+
+    def _finish(self, metadata: Optional[Dict], known_keys: AbstractSet[str], remote: Dict[str, dict],
+                outcomes: Iterable[Tuple[Tuple[str, str, str], object]], synced_at: float,
+                error: Optional[BaseException] = None):
+        """record finished transfers, save metadata and raise the first error
+
+        outcomes pairs each planned (operation, rel_path, local_path) with
+        the transfer's result or exception
+        """
+        changed = False
+        for (operation, rel_path, local_path), result in outcomes:
+            if isinstance(result, BaseException):
+                if error is None:
+                    error = result
+                continue
+            if self._record_transfer(metadata, known_keys, remote, operation, rel_path,
+                                     local_path, result, synced_at):
+                changed = True
+
+        self.etag_cache.save()
+        # a sync that transferred nothing leaves the remote metadata alone
+        if changed:
             self.metadata.save(metadata)
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def _completed(futures: Dict, cancel: bool) -> Iterator[Tuple[Tuple[str, str, str], object]]:
+        """yield (planned transfer, result or exception) as futures finish
+
+        the first failure, or cancel, drops the transfers not yet started;
+        the ones already in flight are still waited for and yielded
+        """
+        remaining = set(futures)
+        if cancel:
+            remaining = {f for f in remaining if not f.cancel()}
+        while remaining:
+            for future in as_completed(remaining):
+                remaining.discard(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield futures[future], result
+                if isinstance(result, Exception) and not cancel:
+                    cancel = True
+                    remaining = {f for f in remaining if not f.cancel()}
+                    # as_completed keeps its own set, start over on what is left
+                    break
+
+    def sync(self, prescanned_files: Optional[Dict[str, int]] = None):
+        """perform sync between local and S3
+
+        prescanned_files is a scan the caller just made, normally last_scan
+        right after get_sync_stats(); without one the tree is walked afresh
+        and files are planned as the walk yields them
+        """
+        # released on the way out, whether the sync finished or raised
+        with self.lock:
+            if prescanned_files is not None:
+                local_files = prescanned_files.items()
+            else:
+                local_files = get_local_files(self.local_path, self.extensions, self.blacklist, self.ignore_dirs)
+
+            # boto3 clients are thread-safe, so all workers share self.s3_client;
+            # metadata is only touched from this thread as futures complete.
+            # Transfers are queued as soon as they are planned: a worker picks up
+            # the next one as soon as it is free, so one slow file never holds
+            # back a batch.
+            error = None
+            # one timestamp for the whole run instead of a clock read per file
+            synced_at = time.time()
+            # directories may have been removed since the last run
+            self._ensured_dirs.clear()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                metadata = None
+                known_keys = frozenset()
+                remote = {}
+                try:
+                    # one paginated listing tells us what really exists remotely,
+                    # fetched while metadata loads and the local walk runs
+                    remote_future = executor.submit(self._list_remote)
+
+                    # metadata is reloaded under the lock; its keys are kept as
+                    # loaded, so checks stay stable while finished transfers are
+                    # written back into metadata
+                    metadata = self.metadata.load()
+                    known_keys = frozenset(metadata)
+                    self.etag_cache.load()
+
+                    seen = set()
+                    downloads = []
+                    for operation, rel_path, s3_key, local_path, entry in self._plan_uploads(
+                            local_files, metadata, seen, downloads):
+                        future = executor.submit(self._upload_file, rel_path, s3_key, local_path, entry)
+                        futures[future] = (operation, rel_path, local_path)
 
-        finally:
-            self.lock.release()
+                    remote = remote_future.result()
+                    for operation, rel_path, s3_key, local_path, file_times in self._plan_downloads(
+                            remote, metadata, seen, known_keys, downloads):
+                        future = executor.submit(self._download_file, rel_path, s3_key, local_path, file_times)
+                        futures[future] = (operation, rel_path, local_path)
+                except Exception as e:
+                    # a failed listing or metadata load must not lose the
+                    # transfers already done: drop the queued ones and record
+                    # the rest like any other failure
+                    error = e
+
+                self._finish(metadata, known_keys, remote, self._completed(futures, error is not None),
+                             synced_at, error)
 
     def get_sync_stats(self) -> tuple[int, int, int]:
         """get sync stats
@@ -171,21 +533,39 @@ class S3Sync:
         to_download = 0
         total_files = 0
         
-        metadata = self.metadata.load()
-        local_files = get_local_files(self.local_path, self.extensions, self.blacklist)
+        # fetch remote state in the background while the local tree is walked
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            metadata_future = executor.submit(self.metadata.load)
+            remote_future = executor.submit(self._list_remote)
+            self.etag_cache.load()
+            local_files = dict(get_local_files(self.local_path, self.extensions, self.blacklist, self.ignore_dirs))
+            metadata = metadata_future.result()
+            remote = remote_future.result()
+        self.last_scan = local_files
         total_files = len(local_files)
 
-        for rel_path, local_mtime in local_files.items():
-            if rel_path in metadata:
-                s3_mtime = metadata[rel_path]['mtime']
-                if local_mtime != s3_mtime:
-                    to_upload += 1
-            else:
+        # same plan as sync(); files whose mtime moved forward are hashed,
+        # or looked up in the ETag cache, to spot unmodified ones
+        touched = []
+        for operation, rel_path, entry in self._plan_local(local_files.items(), metadata, set()):
+            if operation == 'upload':
                 to_upload += 1
+            elif operation == 'download':
+                # as in sync(), only if the object still exists
+                if rel_path in remote:
+                    to_download += 1
+            else:
+                touched.append((rel_path, entry))
+
+        if touched:
+            # hashlib releases the GIL on large buffers, so threads hash in parallel
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                unchanged = list(executor.map(lambda item: self._is_unchanged(*item), touched))
+            to_upload += unchanged.count(False)
+        self.etag_cache.save()
 
-        for rel_path in metadata:
-            if rel_path not in local_files:
-                to_download += 1
-                total_files += 1
+        missing = self._missing_locally(remote, local_files.keys(), metadata)
+        to_download += len(missing)
+        total_files += len(missing)
 
         return total_files, to_upload, to_download
\ No newline at end of file
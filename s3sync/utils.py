@@ -1,39 +1,102 @@
 """Utility functions for S3 sync"""
 
 import os
-from typing import Set
+import hashlib
+import logging
+from typing import AbstractSet, BinaryIO, Callable, Iterator, Tuple
+from s3transfer.utils import ChunksizeAdjuster
 
-def ignore_file(filename: str) -> bool:
-    """Check if file should be ignored"""
+logger = logging.getLogger(__name__)
 
-    ignore_files = ['.s3-remotely-sync.yml', '.DS_Store']
+# bookkeeping objects every sync root keeps next to the synced files
+SYNC_INTERNAL_FILES = frozenset({'.sync_metadata.json', '.sync_lock'})
+IGNORE_FILES = frozenset({'.s3-remotely-sync.yml', '.DS_Store'}) | SYNC_INTERNAL_FILES
+# directories not descended into unless the caller passes its own set
+DEFAULT_IGNORE_DIRS = frozenset({'.git', 'node_modules', '__pycache__', '.venv'})
 
-    return filename in ignore_files
+def in_ignored_dir(key: str, ignore_dirs: AbstractSet[str]) -> bool:
+    """Check if a '/'-separated key lies below one of the ignored directory names"""
+    return bool(ignore_dirs) and not ignore_dirs.isdisjoint(key.split('/')[:-1])
 
-def should_sync_file(filename: str, extensions: Set[str], blacklist: bool) -> bool:
-    """Check if file should be synced based on extension rules"""
-    if ignore_file(filename):
+def is_safe_rel_path(rel_path: str) -> bool:
+    """Check if a '/'-separated key stays inside the sync root when joined onto it"""
+    if os.path.isabs(rel_path) or os.path.splitdrive(rel_path)[0]:
         return False
-    
+    parts = rel_path.split('/')
+    if os.altsep:
+        # Windows also splits on the backslash, so a key like a\..\b escapes too
+        parts = [part for segment in parts for part in segment.split(os.sep)]
+    return not any(part in ('', '.', '..') for part in parts)
+
+def compile_file_filter(extensions: AbstractSet[str], blacklist: bool) -> Callable[[str], bool]:
+    """Build the check whether a file name is synced, once for a whole directory walk"""
     if not extensions:
-        return True
-        
-    if filename.startswith('.'):
-        ext = filename.lower()
-    else:
-        ext = os.path.splitext(filename)[1].lower()
+        return lambda filename: filename not in IGNORE_FILES
 
+    # extensions are lowercased by the caller; one C-level endswith over a
+    # tuple per file, no splitext or set lookup. The suffix test matches
+    # compound extensions like .tar.gz, and a dotfile by its last suffix too
+    # (.eslintrc.json is a .json file); the leading dot keeps md from
+    # matching x.cmd or a file named md
+    ext_tuple = tuple(ext if ext.startswith('.') else '.' + ext for ext in extensions)
     if blacklist:
-        return ext not in extensions
-    return ext in extensions
-
-def get_local_files(local_path: str, extensions: Set[str], blacklist: bool) -> dict:
-    """Get all local files with their modification times"""
-    local_files = {}
-    for root, _, files in os.walk(local_path):
-        for filename in files:
-            if should_sync_file(filename, extensions, blacklist):
-                full_path = os.path.join(root, filename)
-                rel_path = os.path.relpath(full_path, local_path)
-                local_files[rel_path] = os.path.getmtime(full_path)
-    return local_files 
+        return lambda filename: filename not in IGNORE_FILES and not filename.lower().endswith(ext_tuple)
+    return lambda filename: filename not in IGNORE_FILES and filename.lower().endswith(ext_tuple)
+
+def fileobj_etag(f: BinaryIO, size: int, multipart_threshold: int, multipart_chunksize: int) -> str:
+    """Compute the ETag of an open file of the given size, reading it to the end"""
+    if size < multipart_threshold:
+        return hashlib.file_digest(f, 'md5').hexdigest()
+
+    # multipart ETag: md5 of the concatenated part digests, plus part count
+    chunksize = ChunksizeAdjuster().adjust_chunksize(multipart_chunksize, size)
+    digests = [hashlib.md5(chunk).digest() for chunk in iter(lambda: f.read(chunksize), b'')]
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+def _scan_files(local_path: str, ignore_dirs: AbstractSet[str]) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield (relative path, DirEntry) for every file below local_path"""
+    # explicit stack instead of os.walk: DirEntry keeps the type (and on
+    # Windows the stat) from the directory listing, so no extra stat per
+    # file, and relative paths are built while descending, not via relpath
+    stack = [(local_path, '')]
+    while stack:
+        path, rel_dir = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            # unreadable directory, skipped like os.walk does
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir():
+                    # ignored directories are pruned here, never listed at all
+                    if not entry.is_symlink() and entry.name not in ignore_dirs:
+                        stack.append((entry.path, rel_dir + entry.name + os.sep))
+                else:
+                    yield rel_dir + entry.name, entry
+
+def get_local_files(local_path: str, extensions: AbstractSet[str], blacklist: bool,
+                    ignore_dirs: AbstractSet[str] = DEFAULT_IGNORE_DIRS) -> Iterator[Tuple[str, int]]:
+    """Yield (relative path, modification time in ns) for every local file to sync"""
+    if not extensions:
+        # the common no-filter case: ignore list checked inline, no call per file
+        for rel_path, entry in _scan_files(local_path, ignore_dirs):
+            if entry.name not in IGNORE_FILES:
+                try:
+                    mtime_ns = entry.stat().st_mtime_ns
+                except OSError as e:
+                    # broken symlink or a file deleted mid-walk: skip it, not the whole scan
+                    logger.warning(f"skipping {rel_path}: {e}")
+                    continue
+                yield rel_path, mtime_ns
+        return
+
+    sync_file = compile_file_filter(extensions, blacklist)
+    for rel_path, entry in _scan_files(local_path, ignore_dirs):
+        if sync_file(entry.name):
+            try:
+                mtime_ns = entry.stat().st_mtime_ns
+            except OSError as e:
+                logger.warning(f"skipping {rel_path}: {e}")
+                continue
+            yield rel_path, mtime_ns
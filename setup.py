@@ -36,6 +36,10 @@ setup(
     ],
     python_requires=">=3.11",
     install_requires=install_requires,
+    extras_require={
+        "async": ["aioboto3>=12.0.0"],
+        "fast": ["orjson>=3.8.0"],
+    },
     entry_points={
         "console_scripts": [
             "s3rs=s3sync.cli:main",